@@ -3,7 +3,7 @@ import path from 'node:path';
 import crypto from 'node:crypto';
 import Boom from '@hapi/boom';
 import { mergeLimits } from './limits.js';
-import type { RunRequest, RunRecord } from './types.js';
+import type { Language, RunRequest, RunRecord } from './types.js';
 import { ArtifactStorage } from './storage.js';
 import { Logger } from '../util/logger.js';
 import type { SandboxRunner } from './types.js';
@@ -25,13 +25,26 @@ function generateId(length: number): string {
   return id;
 }
 
+export function validateLanguage(language: string | undefined): asserts language is Language {
+  if (!language) {
+    throw Boom.badRequest('language is required');
+  }
+  if (!['python', 'node', 'ruby', 'php', 'go'].includes(language)) {
+    throw Boom.badRequest('unsupported language');
+  }
+}
+
 export class Orchestrator {
   constructor(private readonly options: OrchestratorOptions) {
     fs.mkdirSync(this.options.workRoot, { recursive: true });
     this.options.artifactStorage.ensureBaseDir();
   }
 
-  public async createRun(request: RunRequest, apiKey: string): Promise<RunRecord> {
+  public async createRun(
+    request: RunRequest,
+    apiKey: string,
+    sandboxRunner: SandboxRunner = this.options.sandboxRunner
+  ): Promise<RunRecord> {
     this.validateRequest(request);
     const limits = mergeLimits(request.limits);
     const runId = `run_${generateId(12)}`;
@@ -44,7 +57,7 @@ export class Orchestrator {
     const codeSha256 = crypto.createHash('sha256').update(request.code).digest('hex');
     const env = this.buildEnvironment(request.env);
 
-    const result = await this.options.sandboxRunner.run({
+    const result = await sandboxRunner.run({
       id: runId,
       language: request.language,
       code: request.code,
@@ -97,12 +110,7 @@ export class Orchestrator {
   }
 
   private validateRequest(request: RunRequest) {
-    if (!request.language) {
-      throw Boom.badRequest('language is required');
-    }
-    if (!['python', 'node', 'ruby', 'php', 'go'].includes(request.language)) {
-      throw Boom.badRequest('unsupported language');
-    }
+    validateLanguage(request.language);
     if (!request.code) {
       throw Boom.badRequest('code is required');
     }
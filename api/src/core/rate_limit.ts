@@ -10,7 +10,8 @@ export class TokenBucketLimiter {
 
   constructor(private readonly defaultRps: number, private readonly defaultBurst: number) {}
 
-  public check(key: string, rps?: number, burst?: number) {
+  // Takes `cost` tokens at once, or none when fewer are available
+  public check(key: string, rps?: number, burst?: number, cost = 1) {
     const now = Date.now();
     const state = this.buckets.get(key) ?? { tokens: burst ?? this.defaultBurst, lastRefill: now };
     const rate = rps ?? this.defaultRps;
@@ -18,13 +19,16 @@ export class TokenBucketLimiter {
     const elapsed = (now - state.lastRefill) / 1000;
     const refill = elapsed * rate;
     const newTokens = Math.min(capacity, state.tokens + refill);
-    if (newTokens < 1) {
+    if (cost > capacity) {
+      throw Boom.badRequest(`request needs ${cost} rate limit tokens but burst is ${capacity}`);
+    }
+    if (newTokens < cost) {
       state.tokens = newTokens;
       state.lastRefill = now;
       this.buckets.set(key, state);
       throw Boom.tooManyRequests('rate limit exceeded');
     }
-    state.tokens = newTokens - 1;
+    state.tokens = newTokens - cost;
     state.lastRefill = now;
     this.buckets.set(key, state);
   }
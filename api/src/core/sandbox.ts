@@ -3,9 +3,16 @@ import fs from 'node:fs';
 import path from 'node:path';
 import { once } from 'node:events';
 import crypto from 'node:crypto';
-import type { SandboxResult, SandboxRunSpec, SandboxRunner } from './types.js';
+import { promisify } from 'node:util';
+import { DEFAULT_LIMITS } from './limits.js';
+import type { Language, RunLimits, SandboxResult, SandboxRunSpec, SandboxRunner, WorkerHandle, WorkerLauncher, WorkerLimits } from './types.js';
 import { Logger } from '../util/logger.js';
 
+const execFile = promisify(childProcess.execFile);
+
+// Host-side writes into a run directory never follow a symlink planted there
+const NOFOLLOW_WRITE = fs.constants.O_WRONLY | fs.constants.O_CREAT | fs.constants.O_TRUNC | fs.constants.O_NOFOLLOW;
+
 const languageImageMap: Record<string, string> = {
   python: process.env.RUNNER_IMAGE_PYTHON ?? 'code-executor-runner-python:latest',
   node: process.env.RUNNER_IMAGE_NODE ?? 'code-executor-runner-node:latest',
@@ -14,24 +21,124 @@ const languageImageMap: Record<string, string> = {
   go: process.env.RUNNER_IMAGE_GO ?? 'code-executor-runner-go:latest'
 };
 
+// Image entrypoints, invoked directly when running inside a warm worker
+const languageEntrypointMap: Record<string, string[]> = {
+  python: ['/usr/local/bin/runner'],
+  node: ['/usr/local/bin/runner'],
+  ruby: ['/usr/local/bin/runner'],
+  php: ['/usr/local/bin/runner'],
+  go: ['python3', '/entrypoint.py']
+};
+
 export interface DockerRunnerOptions {
   workRoot: string;
   seccompProfile: string;
   appArmorProfile?: string;
+  goBuildCacheVolume?: string;
 }
 
-export class DockerSandbox implements SandboxRunner {
+export class DockerSandbox implements SandboxRunner, WorkerLauncher {
   constructor(private readonly options: DockerRunnerOptions, private readonly logger: Logger) { }
 
   public async run(spec: SandboxRunSpec): Promise<SandboxResult> {
     const image = languageImageMap[spec.language];
     const runDir = spec.workdir;
+    this.prepareWorkdir(runDir, spec);
+    const containerName = this.containerName(spec);
+    const dockerArgs = this.buildDockerArgs(image, containerName, runDir, spec);
+    this.logger.info('launching sandbox', { specId: spec.id, dockerArgs });
+    // Killing the docker CLI would leave the container running
+    return this.invoke(dockerArgs, runDir, spec, () => execFile('docker', ['kill', containerName]));
+  }
+
+  public async launchWorker(id: string, language: Language, limits: WorkerLimits): Promise<WorkerHandle> {
+    const image = languageImageMap[language];
+    const workerDir = path.join(this.options.workRoot, id);
+    fs.mkdirSync(workerDir, { recursive: true });
+    const dockerArgs = [
+      'run',
+      '-d',
+      '--rm',
+      '--name',
+      id,
+      ...this.isolationArgs(language, { ...DEFAULT_LIMITS, ...limits }, workerDir),
+      '--entrypoint',
+      'sleep',
+      image,
+      'infinity'
+    ];
+    this.logger.info('launching worker', { workerId: id, dockerArgs });
+    await execFile('docker', dockerArgs);
+    return {
+      run: (spec) => this.runInWorker(id, workerDir, spec),
+      dispose: async () => {
+        await execFile('docker', ['rm', '-f', id]);
+        fs.rmSync(workerDir, { recursive: true, force: true });
+      }
+    };
+  }
+
+  private async runInWorker(containerName: string, workerDir: string, spec: SandboxRunSpec): Promise<SandboxResult> {
+    // Nothing from an earlier run may still be running while the host
+    // rewrites /work, or it could swap entries for symlinks underneath us
+    await this.killStrays(containerName);
+    // Start every run from an empty /work, as a fresh container would
+    for (const entry of fs.readdirSync(workerDir)) {
+      fs.rmSync(path.join(workerDir, entry), { recursive: true, force: true });
+    }
+    this.prepareWorkdir(workerDir, spec);
+    const dockerArgs = ['exec', '-i', containerName, ...languageEntrypointMap[spec.language]];
+    this.logger.info('executing in worker', { specId: spec.id, dockerArgs });
+    let result: SandboxResult;
+    try {
+      result = await this.invoke(dockerArgs, workerDir, spec, () => this.killStrays(containerName));
+    } finally {
+      // Runners only reap their direct child; drop anything it backgrounded
+      await this.killStrays(containerName);
+    }
+
+    // The orchestrator only accepts artifacts from the run's own workdir
+    const outputsDir = path.join(spec.workdir, 'outputs');
+    fs.mkdirSync(outputsDir, { recursive: true });
+    result.artifacts = result.artifacts.map((artifact) => {
+      const dest = path.join(outputsDir, artifact.name);
+      fs.copyFileSync(artifact.path, dest, fs.constants.COPYFILE_EXCL);
+      return { ...artifact, path: dest };
+    });
+    return result;
+  }
+
+  private async killStrays(containerName: string) {
+    // kill -1 signals every process except init (sleep) and the shell itself;
+    // sweep again to catch children forked mid-sweep, stopping once none remain
+    await execFile('docker', [
+      'exec',
+      containerName,
+      'sh',
+      '-c',
+      'for i in 1 2 3; do kill -9 -1 2>/dev/null || exit 0; done'
+    ]);
+  }
+
+  private prepareWorkdir(runDir: string, spec: SandboxRunSpec) {
     fs.mkdirSync(runDir, { recursive: true });
     const codeFile = path.join(runDir, this.entryFileName(spec.language));
-    fs.writeFileSync(codeFile, spec.code, { encoding: 'utf8' });
+    const fd = fs.openSync(codeFile, NOFOLLOW_WRITE, 0o644);
+    try {
+      fs.writeFileSync(fd, spec.code, { encoding: 'utf8' });
+    } finally {
+      fs.closeSync(fd);
+    }
     this.stageFiles(runDir, spec.stagedFiles);
-    const dockerArgs = this.buildDockerArgs(image, runDir, spec);
-    this.logger.info('launching sandbox', { specId: spec.id, dockerArgs });
+  }
+
+  private async invoke(
+    dockerArgs: string[],
+    runDir: string,
+    spec: SandboxRunSpec,
+    stop: () => Promise<unknown>
+  ): Promise<SandboxResult> {
+    const startedAt = Date.now();
     const child = childProcess.spawn('docker', dockerArgs, {
       stdio: ['pipe', 'pipe', 'pipe']
     });
@@ -42,22 +149,39 @@ export class DockerSandbox implements SandboxRunner {
       limits: spec.limits
     }));
 
+    // Runners cap their own output, but a program exec'd directly
+    // (no_usage_json) writes straight to docker, so cap collection here too
+    const maxBytes = spec.limits.max_output_bytes;
+    let outputLimitHit = false;
+    const collect = (chunks: Buffer[], size: { bytes: number }) => (chunk: Buffer) => {
+      if (size.bytes > maxBytes) {
+        return;
+      }
+      chunks.push(chunk);
+      size.bytes += chunk.length;
+      if (size.bytes > maxBytes && !outputLimitHit) {
+        outputLimitHit = true;
+        stop().catch((err: Error) => {
+          this.logger.warn('failed to stop sandbox past output limit', { specId: spec.id, message: err.message });
+        });
+      }
+    };
     const stdoutChunks: Buffer[] = [];
     const stderrChunks: Buffer[] = [];
-    child.stdout.on('data', (chunk: Buffer) => {
-      stdoutChunks.push(chunk);
-    });
-    child.stderr.on('data', (chunk: Buffer) => {
-      stderrChunks.push(chunk);
-    });
+    child.stdout.on('data', collect(stdoutChunks, { bytes: 0 }));
+    child.stderr.on('data', collect(stderrChunks, { bytes: 0 }));
 
     const [code, signal] = (await once(child, 'exit')) as [number | null, NodeJS.Signals | null];
+    const wallMs = Date.now() - startedAt;
 
-    const stdout = Buffer.concat(stdoutChunks).slice(0, spec.limits.max_output_bytes);
-    const stderr = Buffer.concat(stderrChunks).slice(0, spec.limits.max_output_bytes);
+    const stdout = Buffer.concat(stdoutChunks).slice(0, maxBytes);
+    let stderr = Buffer.concat(stderrChunks).slice(0, maxBytes);
 
     let status: SandboxResult['status'] = 'succeeded';
-    if (signal === 'SIGKILL') {
+    if (outputLimitHit) {
+      status = 'failed';
+      stderr = Buffer.concat([stderr, Buffer.from('\nOutput limit exceeded\n')]);
+    } else if (signal === 'SIGKILL') {
       status = 'timeout';
     } else if (code === 137) {
       status = 'oom';
@@ -66,9 +190,20 @@ export class DockerSandbox implements SandboxRunner {
     }
 
     const usagePath = path.join(runDir, 'usage.json');
-    let usage = { wall_ms: spec.limits.timeout_ms, cpu_ms: spec.limits.cpu_ms, max_rss_mb: spec.limits.memory_mb };
-    if (fs.existsSync(usagePath)) {
-      usage = JSON.parse(fs.readFileSync(usagePath, 'utf8'));
+    let usage = {
+      wall_ms: spec.limits.no_usage_json ? wallMs : spec.limits.timeout_ms,
+      cpu_ms: spec.limits.cpu_ms,
+      max_rss_mb: spec.limits.memory_mb
+    };
+    // With no_usage_json the runner never writes usage.json, so any file
+    // there came from the program itself. Otherwise the run still controls
+    // /work, so only a regular file is read and a bad one is ignored
+    if (!spec.limits.no_usage_json && fs.existsSync(usagePath) && fs.lstatSync(usagePath).isFile()) {
+      try {
+        usage = JSON.parse(fs.readFileSync(usagePath, 'utf8'));
+      } catch (err) {
+        this.logger.warn('ignoring unreadable usage.json', { specId: spec.id, message: (err as Error).message });
+      }
     }
 
     const artifacts = this.collectArtifacts(runDir);
@@ -83,38 +218,58 @@ export class DockerSandbox implements SandboxRunner {
     };
   }
 
-  private buildDockerArgs(image: string, runDir: string, spec: SandboxRunSpec): string[] {
+  private containerName(spec: SandboxRunSpec): string {
     const alphabet = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ';
     const bytes = crypto.randomBytes(6);
     let suffix = '';
     for (let i = 0; i < 6; i++) {
       suffix += alphabet[bytes[i] % alphabet.length];
     }
-    const containerName = `run_${spec.id}_${suffix}`;
-    const disableSecurity = process.env.DISABLE_SANDBOX_SECURITY === '1';
-    const hostSandbox = process.env.HOST_SANDBOX_DIR;
-    const hostRunDir = hostSandbox ? path.join(hostSandbox, path.basename(runDir)) : runDir;
-    // Go compiler needs more processes for compilation
-    const pidsLimit = spec.language === 'go' ? '256' : '32';
+    return `run_${spec.id}_${suffix}`;
+  }
+
+  private buildDockerArgs(image: string, containerName: string, runDir: string, spec: SandboxRunSpec): string[] {
     const args: string[] = [
       'run',
       '-i',
       '--rm',
       '--name',
       containerName,
+      ...this.isolationArgs(spec.language, spec.limits, runDir)
+    ];
+    args.push(image);
+    args.push('--');
+    return args;
+  }
+
+  private isolationArgs(language: Language, limits: RunLimits, runDir: string): string[] {
+    const disableSecurity = process.env.DISABLE_SANDBOX_SECURITY === '1';
+    const hostSandbox = process.env.HOST_SANDBOX_DIR;
+    const hostRunDir = hostSandbox ? path.join(hostSandbox, path.basename(runDir)) : runDir;
+    // Go compiler needs more processes for compilation
+    const pidsLimit = language === 'go' ? '256' : '32';
+    const args: string[] = [
       '--network=none',
       '--read-only',
       `--pids-limit=${pidsLimit}`,
+      '--ulimit',
+      'nofile=256:256',
       '--cpus',
-      (spec.limits.cpu_ms / 1000).toFixed(2),
+      (limits.cpu_ms / 1000).toFixed(2),
       '--memory',
-      `${spec.limits.memory_mb}m`,
+      `${limits.memory_mb}m`,
       '--memory-swap',
-      `${spec.limits.memory_mb}m`,
+      `${limits.memory_mb}m`,
       '--cap-drop=ALL',
       '--mount',
       `type=bind,src=${hostRunDir},dst=/work`
     ];
+    // Share Go's build cache across runs so compiled stdlib and packages are
+    // reused; the volume is writable by every run, so it is opt-in
+    if (language === 'go' && this.options.goBuildCacheVolume) {
+      args.push('--mount', `type=volume,src=${this.options.goBuildCacheVolume},dst=/gocache`);
+      args.push('-e', 'GOCACHE=/gocache');
+    }
     if (!disableSecurity) {
       args.push('--security-opt', 'no-new-privileges:true');
       args.push('--security-opt', `seccomp=${this.options.seccompProfile}`);
@@ -122,8 +277,6 @@ export class DockerSandbox implements SandboxRunner {
         args.push('--security-opt', `apparmor=${this.options.appArmorProfile}`);
       }
     }
-    args.push(image);
-    args.push('--');
     return args;
   }
 
@@ -134,13 +287,18 @@ export class DockerSandbox implements SandboxRunner {
       }
       const dest = path.join(runDir, 'inputs', file.destPath);
       fs.mkdirSync(path.dirname(dest), { recursive: true });
-      fs.copyFileSync(file.sourcePath, dest);
+      // Refuse directories that resolve elsewhere through a symlink
+      if (fs.realpathSync(path.dirname(dest)) !== path.join(fs.realpathSync(runDir), path.relative(runDir, path.dirname(dest)))) {
+        throw new Error(`staged file escapes run directory: ${file.destPath}`);
+      }
+      fs.copyFileSync(file.sourcePath, dest, fs.constants.COPYFILE_EXCL);
     }
   }
 
   private collectArtifacts(runDir: string): SandboxResult['artifacts'] {
     const outputsDir = path.join(runDir, 'outputs');
-    if (!fs.existsSync(outputsDir)) {
+    // lstat so a symlinked outputs directory is not followed
+    if (!fs.existsSync(outputsDir) || !fs.lstatSync(outputsDir).isDirectory()) {
       return [];
     }
     const entries = fs.readdirSync(outputsDir, { withFileTypes: true });
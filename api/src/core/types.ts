@@ -7,6 +7,8 @@ export interface RunLimits {
   max_output_bytes: number;
   max_artifact_bytes: number;
   max_artifact_files: number;
+  // Runner execs the program directly and skips usage.json; wall time is measured by the sandbox
+  no_usage_json?: boolean;
 }
 
 export interface RunUsage {
@@ -81,3 +83,22 @@ export interface SandboxRunSpec {
 export interface SandboxRunner {
   run(spec: SandboxRunSpec): Promise<SandboxResult>;
 }
+
+// Limits applied to the worker container itself rather than per run
+export type WorkerLimits = Pick<RunLimits, 'memory_mb' | 'cpu_ms'>;
+
+export interface WorkerInfo {
+  id: string;
+  language: Language;
+  limits: WorkerLimits;
+  created_at: string;
+  expires_at: string;
+}
+
+export interface WorkerHandle extends SandboxRunner {
+  dispose(): Promise<void>;
+}
+
+export interface WorkerLauncher {
+  launchWorker(id: string, language: Language, limits: WorkerLimits): Promise<WorkerHandle>;
+}
@@ -0,0 +1,121 @@
+import crypto from 'node:crypto';
+import Boom from '@hapi/boom';
+import type { Language, SandboxRunner, WorkerHandle, WorkerInfo, WorkerLauncher, WorkerLimits } from './types.js';
+import { Logger } from '../util/logger.js';
+
+export interface WorkerPoolOptions {
+  launcher: WorkerLauncher;
+  idleTimeoutMs: number;
+  maxWorkersPerKey: number;
+  logger: Logger;
+}
+
+interface WorkerEntry {
+  id: string;
+  language: Language;
+  apiKey: string;
+  limits: WorkerLimits;
+  handle: WorkerHandle;
+  createdAt: number;
+  lastUsed: number;
+  // Runs share the worker's /work directory, so they execute one at a time
+  queue: Promise<unknown>;
+}
+
+export class WorkerPool {
+  private readonly workers = new Map<string, WorkerEntry>();
+  // Workers still being launched, counted against the per-key cap
+  private readonly launching = new Map<string, number>();
+
+  constructor(private readonly options: WorkerPoolOptions) {}
+
+  public async create(language: Language, apiKey: string, limits: WorkerLimits): Promise<WorkerInfo> {
+    const owned = [...this.workers.values()].filter((entry) => entry.apiKey === apiKey).length;
+    const pending = this.launching.get(apiKey) ?? 0;
+    if (owned + pending >= this.options.maxWorkersPerKey) {
+      throw Boom.tooManyRequests('worker limit reached');
+    }
+    // Reserve the slot before awaiting so concurrent creates see it
+    this.launching.set(apiKey, pending + 1);
+    const id = `worker_${crypto.randomBytes(6).toString('hex')}`;
+    let handle: WorkerHandle;
+    try {
+      handle = await this.options.launcher.launchWorker(id, language, limits);
+    } finally {
+      const remaining = (this.launching.get(apiKey) ?? 1) - 1;
+      if (remaining > 0) {
+        this.launching.set(apiKey, remaining);
+      } else {
+        this.launching.delete(apiKey);
+      }
+    }
+    const now = Date.now();
+    const entry: WorkerEntry = { id, language, apiKey, limits, handle, createdAt: now, lastUsed: now, queue: Promise.resolve() };
+    this.workers.set(id, entry);
+    this.options.logger.info('worker started', { workerId: id, language, apiKey });
+    return this.describe(entry);
+  }
+
+  public get(id: string, apiKey: string): WorkerInfo {
+    return this.describe(this.lookup(id, apiKey));
+  }
+
+  public touch(id: string, apiKey: string): WorkerInfo {
+    const entry = this.lookup(id, apiKey);
+    entry.lastUsed = Date.now();
+    return this.describe(entry);
+  }
+
+  public runner(id: string, apiKey: string): SandboxRunner {
+    const entry = this.lookup(id, apiKey);
+    return {
+      run: (spec) => {
+        const result = entry.queue.then(() => {
+          entry.lastUsed = Date.now();
+          return entry.handle.run(spec);
+        });
+        entry.queue = result.catch(() => undefined);
+        return result;
+      }
+    };
+  }
+
+  public async remove(id: string, apiKey: string) {
+    const entry = this.lookup(id, apiKey);
+    await this.dispose(entry);
+  }
+
+  public async reap(now = Date.now()) {
+    const idle = [...this.workers.values()].filter((entry) => now - entry.lastUsed > this.options.idleTimeoutMs);
+    await Promise.all(idle.map((entry) => this.dispose(entry)));
+  }
+
+  private lookup(id: string, apiKey: string): WorkerEntry {
+    const entry = this.workers.get(id);
+    if (!entry || entry.apiKey !== apiKey) {
+      throw Boom.notFound('worker not found');
+    }
+    return entry;
+  }
+
+  private async dispose(entry: WorkerEntry) {
+    this.workers.delete(entry.id);
+    try {
+      await entry.queue;
+      await entry.handle.dispose();
+      this.options.logger.info('worker stopped', { workerId: entry.id });
+    } catch (err) {
+      this.options.logger.warn('failed to stop worker', { workerId: entry.id, message: (err as Error).message });
+    }
+  }
+
+  private describe(entry: WorkerEntry): WorkerInfo {
+    return {
+      id: entry.id,
+      language: entry.language,
+      limits: entry.limits,
+      created_at: new Date(entry.createdAt).toISOString(),
+      expires_at: new Date(entry.lastUsed + this.options.idleTimeoutMs).toISOString()
+    };
+  }
+}
@@ -15,9 +15,11 @@ import { TokenBucketLimiter } from './core/rate_limit.js';
 import { RunStore } from './core/run_store.js';
 import { Orchestrator } from './core/orchestrator.js';
 import { DockerSandbox } from './core/sandbox.js';
+import { WorkerPool } from './core/worker_pool.js';
 import { registerHealthRoutes } from './routes/health.js';
 import { registerFileRoutes } from './routes/files.js';
 import { registerRunRoutes } from './routes/runs.js';
+import { registerWorkerRoutes } from './routes/workers.js';
 
 const logger = new Logger({ service: 'code-executor-api' });
 
@@ -47,7 +49,8 @@ const sandbox = new DockerSandbox(
   {
     workRoot: process.env.SANDBOX_WORKDIR ?? '/sandbox',
     seccompProfile: process.env.SECCOMP_PROFILE ?? '/seccomp/default.json',
-    appArmorProfile: process.env.APPARMOR_PROFILE
+    appArmorProfile: process.env.APPARMOR_PROFILE,
+    goBuildCacheVolume: process.env.GO_BUILD_CACHE_VOLUME
   },
   logger.child({ component: 'sandbox' })
 );
@@ -59,6 +62,17 @@ const orchestrator = new Orchestrator({
   logger: logger.child({ component: 'orchestrator' })
 });
 
+const workerPool = new WorkerPool({
+  launcher: sandbox,
+  idleTimeoutMs: Number(process.env.WORKER_IDLE_TIMEOUT_MS ?? 300000),
+  maxWorkersPerKey: Number(process.env.WORKER_MAX_PER_KEY ?? 5),
+  logger: logger.child({ component: 'workers' })
+});
+// Stop warm workers whose clients stopped sending keepalives
+setInterval(() => {
+  void workerPool.reap();
+}, 30000).unref();
+
 const app = express();
 // Serve admin UI without Helmet so inline scripts work
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
@@ -274,6 +288,7 @@ app.use('/v1', helmet());  // Security headers for API routes only
 app.use('/v1', authenticator.middleware());
 registerFileRoutes(app, { storage });
 registerRunRoutes(app, { orchestrator, runStore, limiter, tokenLimits: apiKeys });
+registerWorkerRoutes(app, { orchestrator, runStore, limiter, workerPool, tokenLimits: apiKeys });
 
 app.use((err: Boom.Boom | Error, _req: express.Request, res: express.Response, _next: express.NextFunction) => {
   if (!Boom.isBoom(err)) {
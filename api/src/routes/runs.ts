@@ -3,7 +3,9 @@ import type { Router } from 'express';
 import type { Orchestrator } from '../core/orchestrator.js';
 import type { RunStore } from '../core/run_store.js';
 import type { TokenBucketLimiter } from '../core/rate_limit.js';
-import type { RunRequest } from '../core/types.js';
+import type { RunRequest, RunRecord } from '../core/types.js';
+
+const MAX_BATCH_RUNS = 10;
 
 export interface RunRouteDeps {
   orchestrator: Orchestrator;
@@ -29,6 +31,39 @@ export function registerRunRoutes(router: Router, deps: RunRouteDeps) {
     }
   });
 
+  router.post('/v1/runs/batch', async (req, res, next) => {
+    try {
+      const apiKey = (req as typeof req & { apiKey?: string }).apiKey;
+      if (!apiKey) {
+        throw Boom.unauthorized('missing api key');
+      }
+      const batch = (req.body as { batch?: RunRequest[] } | undefined)?.batch;
+      if (!Array.isArray(batch) || batch.length === 0) {
+        throw Boom.badRequest('batch must be a non-empty array');
+      }
+      if (batch.length > MAX_BATCH_RUNS) {
+        throw Boom.badRequest(`batch exceeds ${MAX_BATCH_RUNS} runs`);
+      }
+      const tokenConfig = deps.tokenLimits[apiKey];
+      // Charge the whole batch at once so a rejected batch consumes nothing
+      deps.limiter.check(apiKey, tokenConfig?.rateLimitRps, tokenConfig?.burst, batch.length);
+      // Runs are independent, so schedule their sandboxes concurrently and
+      // report per-run failures inline instead of failing the whole batch
+      const settled = await Promise.allSettled(batch.map((item) => deps.orchestrator.createRun(item, apiKey)));
+      const results: Array<RunRecord | { error: string }> = settled.map((outcome) => {
+        if (outcome.status === 'fulfilled') {
+          deps.runStore.save(outcome.value);
+          return outcome.value;
+        }
+        const reason = outcome.reason as Error;
+        return { error: Boom.isBoom(reason) ? reason.message : 'internal_error' };
+      });
+      res.json(results);
+    } catch (err) {
+      next(err);
+    }
+  });
+
   router.get('/v1/runs/:id', (req, res, next) => {
     try {
       const run = deps.runStore.get(req.params.id);
@@ -0,0 +1,83 @@
+import Boom from '@hapi/boom';
+import type { Router } from 'express';
+import { mergeLimits } from '../core/limits.js';
+import { validateLanguage } from '../core/orchestrator.js';
+import type { Orchestrator } from '../core/orchestrator.js';
+import type { RunStore } from '../core/run_store.js';
+import type { TokenBucketLimiter } from '../core/rate_limit.js';
+import type { WorkerPool } from '../core/worker_pool.js';
+import type { RunRequest } from '../core/types.js';
+
+export interface WorkerRouteDeps {
+  orchestrator: Orchestrator;
+  runStore: RunStore;
+  limiter: TokenBucketLimiter;
+  workerPool: WorkerPool;
+  tokenLimits: Record<string, { rateLimitRps: number; burst: number; label?: string }>;
+}
+
+function requireApiKey(req: unknown): string {
+  const apiKey = (req as { apiKey?: string }).apiKey;
+  if (!apiKey) {
+    throw Boom.unauthorized('missing api key');
+  }
+  return apiKey;
+}
+
+export function registerWorkerRoutes(router: Router, deps: WorkerRouteDeps) {
+  router.post('/v1/workers', async (req, res, next) => {
+    try {
+      const apiKey = requireApiKey(req);
+      const body = req.body as Pick<RunRequest, 'limits'> & { language?: string } | undefined;
+      const language = body?.language;
+      validateLanguage(language);
+      const { memory_mb, cpu_ms } = mergeLimits(body?.limits);
+      const tokenConfig = deps.tokenLimits[apiKey];
+      deps.limiter.check(apiKey, tokenConfig?.rateLimitRps, tokenConfig?.burst);
+      res.json(await deps.workerPool.create(language, apiKey, { memory_mb, cpu_ms }));
+    } catch (err) {
+      next(err);
+    }
+  });
+
+  router.post('/v1/workers/:id/exec', async (req, res, next) => {
+    try {
+      const apiKey = requireApiKey(req);
+      const worker = deps.workerPool.get(req.params.id, apiKey);
+      const tokenConfig = deps.tokenLimits[apiKey];
+      deps.limiter.check(apiKey, tokenConfig?.rateLimitRps, tokenConfig?.burst);
+      const body = req.body as Omit<RunRequest, 'language'>;
+      // Memory and CPU are fixed when the worker container starts, so a run
+      // defaults to them and cannot ask for anything else
+      const limits = mergeLimits({ ...worker.limits, ...body.limits });
+      if (limits.memory_mb !== worker.limits.memory_mb || limits.cpu_ms !== worker.limits.cpu_ms) {
+        throw Boom.badRequest('memory_mb and cpu_ms must match the worker limits');
+      }
+      const request = { ...body, limits, language: worker.language };
+      const run = await deps.orchestrator.createRun(request, apiKey, deps.workerPool.runner(worker.id, apiKey));
+      deps.runStore.save(run);
+      res.json(run);
+    } catch (err) {
+      next(err);
+    }
+  });
+
+  router.post('/v1/workers/:id/keepalive', (req, res, next) => {
+    try {
+      const apiKey = requireApiKey(req);
+      res.json(deps.workerPool.touch(req.params.id, apiKey));
+    } catch (err) {
+      next(err);
+    }
+  });
+
+  router.delete('/v1/workers/:id', async (req, res, next) => {
+    try {
+      const apiKey = requireApiKey(req);
+      await deps.workerPool.remove(req.params.id, apiKey);
+      res.status(204).end();
+    } catch (err) {
+      next(err);
+    }
+  });
+}
@@ -7,11 +7,13 @@ import bodyParser from 'body-parser';
 import { registerHealthRoutes } from '../../src/routes/health.js';
 import { registerFileRoutes } from '../../src/routes/files.js';
 import { registerRunRoutes } from '../../src/routes/runs.js';
+import { registerWorkerRoutes } from '../../src/routes/workers.js';
 import { ArtifactStorage } from '../../src/core/storage.js';
 import { Authenticator } from '../../src/core/auth.js';
 import { TokenBucketLimiter } from '../../src/core/rate_limit.js';
 import { RunStore } from '../../src/core/run_store.js';
 import { Orchestrator } from '../../src/core/orchestrator.js';
+import { WorkerPool } from '../../src/core/worker_pool.js';
 import { Logger } from '../../src/util/logger.js';
 import type { SandboxRunner, SandboxRunSpec, SandboxResult } from '../../src/core/types.js';
 
@@ -90,6 +92,22 @@ describe('Code Executor API', () => {
     app.use(authenticator.middleware());
     registerFileRoutes(app, { storage });
     registerRunRoutes(app, { orchestrator, runStore, limiter, tokenLimits: { [token]: { label: 'dev', rateLimitRps: 5, burst: 5 } } });
+    const mockSandbox = new MockSandbox();
+    const workerPool = new WorkerPool({
+      launcher: {
+        launchWorker: async () => ({ run: (spec) => mockSandbox.run(spec), dispose: async () => undefined })
+      },
+      idleTimeoutMs: 60000,
+      maxWorkersPerKey: 2,
+      logger: new Logger({ test: 'e2e' })
+    });
+    registerWorkerRoutes(app, {
+      orchestrator,
+      runStore,
+      limiter,
+      workerPool,
+      tokenLimits: { [token]: { label: 'dev', rateLimitRps: 5, burst: 5 } }
+    });
     app.use((err: any, _req: express.Request, res: express.Response, _next: express.NextFunction) => {
       if (err.isBoom) {
         res.status(err.output.statusCode).json({ error: err.message });
@@ -164,6 +182,80 @@ describe('Code Executor API', () => {
     expect(run.body.status).toBe('succeeded');
   });
 
+  it('executes a batch of runs in request order', async () => {
+    const res = await request(app)
+      .post('/v1/runs/batch')
+      .set('Authorization', `Bearer ${token}`)
+      .send({
+        batch: [
+          { language: 'python', code: 'print("hi")' },
+          { language: 'python', code: 'while True: pass' },
+          { language: 'cobol', code: 'DISPLAY "HI"' }
+        ]
+      });
+    expect(res.status).toBe(200);
+    expect(res.body).toHaveLength(3);
+    expect(res.body[0].status).toBe('succeeded');
+    expect(res.body[1].status).toBe('timeout');
+    expect(res.body[2].error).toBe('unsupported language');
+  });
+
+  it('rejects an empty batch', async () => {
+    const res = await request(app)
+      .post('/v1/runs/batch')
+      .set('Authorization', `Bearer ${token}`)
+      .send({ batch: [] });
+    expect(res.status).toBe(400);
+  });
+
+  it('executes runs in a warm worker', async () => {
+    const worker = await request(app)
+      .post('/v1/workers')
+      .set('Authorization', `Bearer ${token}`)
+      .send({ language: 'python' });
+    expect(worker.status).toBe(200);
+    expect(worker.body.language).toBe('python');
+    const run = await request(app)
+      .post(`/v1/workers/${worker.body.id}/exec`)
+      .set('Authorization', `Bearer ${token}`)
+      .send({ code: 'print("hi")' });
+    expect(run.status).toBe(200);
+    expect(run.body.status).toBe('succeeded');
+    expect(run.body.language).toBe('python');
+    const keepalive = await request(app)
+      .post(`/v1/workers/${worker.body.id}/keepalive`)
+      .set('Authorization', `Bearer ${token}`);
+    expect(keepalive.status).toBe(200);
+    const removed = await request(app)
+      .delete(`/v1/workers/${worker.body.id}`)
+      .set('Authorization', `Bearer ${token}`);
+    expect(removed.status).toBe(204);
+  });
+
+  it('rejects worker runs whose limits differ from the worker', async () => {
+    const worker = await request(app)
+      .post('/v1/workers')
+      .set('Authorization', `Bearer ${token}`)
+      .send({ language: 'python', limits: { memory_mb: 128 } });
+    expect(worker.body.limits.memory_mb).toBe(128);
+    const run = await request(app)
+      .post(`/v1/workers/${worker.body.id}/exec`)
+      .set('Authorization', `Bearer ${token}`)
+      .send({ code: 'print("hi")', limits: { memory_mb: 512 } });
+    expect(run.status).toBe(400);
+    await request(app)
+      .delete(`/v1/workers/${worker.body.id}`)
+      .set('Authorization', `Bearer ${token}`);
+  });
+
+  it('returns 404 for unknown workers', async () => {
+    const res = await request(app)
+      .post('/v1/workers/worker_missing/exec')
+      .set('Authorization', `Bearer ${token}`)
+      .send({ code: 'print("hi")' });
+    expect(res.status).toBe(404);
+  });
+
   it('enforces rate limit', async () => {
     const agent = request(app);
     for (let i = 0; i < 5; i++) {
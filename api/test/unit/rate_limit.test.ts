@@ -0,0 +1,17 @@
+import { TokenBucketLimiter } from '../../src/core/rate_limit.js';
+
+describe('TokenBucketLimiter', () => {
+  it('takes the full cost or nothing', () => {
+    const limiter = new TokenBucketLimiter(0, 10);
+    limiter.check('key', undefined, undefined, 4);
+    expect(() => limiter.check('key', undefined, undefined, 7)).toThrow('rate limit exceeded');
+    limiter.check('key', undefined, undefined, 6);
+    expect(() => limiter.check('key')).toThrow('rate limit exceeded');
+  });
+
+  it('rejects costs above the burst', () => {
+    const limiter = new TokenBucketLimiter(5, 5);
+    expect(() => limiter.check('key', undefined, undefined, 6)).toThrow('burst is 5');
+    limiter.check('key', undefined, undefined, 5);
+  });
+});
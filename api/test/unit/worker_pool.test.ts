@@ -0,0 +1,93 @@
+import { WorkerPool } from '../../src/core/worker_pool.js';
+import { Logger } from '../../src/util/logger.js';
+import type { WorkerHandle, WorkerLauncher } from '../../src/core/types.js';
+
+class MockLauncher implements WorkerLauncher {
+  public launched: string[] = [];
+  public disposed: string[] = [];
+  private pending: Array<() => void> = [];
+
+  constructor(private readonly deferred = false) {}
+
+  async launchWorker(id: string): Promise<WorkerHandle> {
+    if (this.deferred) {
+      await new Promise<void>((resolve) => this.pending.push(resolve));
+    }
+    this.launched.push(id);
+    return {
+      run: async () => {
+        throw new Error('not used');
+      },
+      dispose: async () => {
+        this.disposed.push(id);
+      }
+    };
+  }
+
+  release() {
+    this.pending.splice(0).forEach((resolve) => resolve());
+  }
+}
+
+const limits = { memory_mb: 256, cpu_ms: 5000 };
+
+function createPool(launcher: WorkerLauncher, maxWorkersPerKey = 2) {
+  return new WorkerPool({
+    launcher,
+    idleTimeoutMs: 1000,
+    maxWorkersPerKey,
+    logger: new Logger({ test: 'worker_pool' })
+  });
+}
+
+describe('WorkerPool', () => {
+  it('enforces the per-key worker cap', async () => {
+    const pool = createPool(new MockLauncher());
+    await pool.create('python', 'key_a', limits);
+    await pool.create('python', 'key_a', limits);
+    await expect(pool.create('python', 'key_a', limits)).rejects.toThrow('worker limit reached');
+    await expect(pool.create('python', 'key_b', limits)).resolves.toMatchObject({ language: 'python', limits });
+  });
+
+  it('counts workers still launching against the cap', async () => {
+    const launcher = new MockLauncher(true);
+    const pool = createPool(launcher);
+    const first = pool.create('python', 'key_a', limits);
+    const second = pool.create('python', 'key_a', limits);
+    await expect(pool.create('python', 'key_a', limits)).rejects.toThrow('worker limit reached');
+    launcher.release();
+    await Promise.all([first, second]);
+    expect(launcher.launched).toHaveLength(2);
+  });
+
+  it('frees the reserved slot when a launch fails', async () => {
+    let fail = true;
+    const launcher = new MockLauncher();
+    const pool = createPool({
+      launchWorker: async (id) => {
+        if (fail) {
+          throw new Error('docker unavailable');
+        }
+        return launcher.launchWorker(id);
+      }
+    }, 1);
+    await expect(pool.create('python', 'key_a', limits)).rejects.toThrow('docker unavailable');
+    fail = false;
+    await expect(pool.create('python', 'key_a', limits)).resolves.toBeDefined();
+  });
+
+  it('reaps workers idle past the timeout', async () => {
+    const launcher = new MockLauncher();
+    const pool = createPool(launcher);
+    const idle = await pool.create('python', 'key_a', limits);
+    const active = await pool.create('python', 'key_a', limits);
+    const later = Date.now() + 1500;
+    const clock = jest.spyOn(Date, 'now').mockReturnValue(later);
+    pool.touch(active.id, 'key_a');
+    clock.mockRestore();
+    await pool.reap(later);
+    expect(launcher.disposed).toEqual([idle.id]);
+    expect(() => pool.get(idle.id, 'key_a')).toThrow('worker not found');
+    expect(pool.get(active.id, 'key_a').id).toBe(active.id);
+  });
+});
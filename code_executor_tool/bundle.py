@@ -0,0 +1,63 @@
+"""
+Inline the shared tool core into a surface file so it can be pasted into
+Open-WebUI as a single self-contained tool.
+
+USAGE:
+    python -m code_executor_tool.bundle openwebui_tool_docker.py > tool.py
+"""
+
+import ast
+import sys
+from pathlib import Path
+
+CORE_PATH = Path(__file__).with_name("core.py")
+CORE_IMPORT = "from code_executor_tool.core import BaseTools\n"
+
+
+def split_docstring(source: str) -> tuple:
+    """Split a module into its leading docstring and the code after it."""
+    tree = ast.parse(source)
+    first = tree.body[0] if tree.body else None
+    if not (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str)):
+        return "", source
+    lines = source.splitlines(keepends=True)
+    return "".join(lines[:first.end_lineno]), "".join(lines[first.end_lineno:])
+
+
+def imported_names(nodes: list) -> set:
+    """Names bound by the top-level import statements among `nodes`."""
+    names = set()
+    for node in nodes:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update(alias.asname or alias.name for alias in node.names)
+    return names
+
+
+def bundle(surface_path: Path) -> str:
+    surface_doc, surface_code = split_docstring(surface_path.read_text())
+    if CORE_IMPORT not in surface_code:
+        raise ValueError(f"{surface_path} does not import BaseTools from code_executor_tool.core")
+    _, core_code = split_docstring(CORE_PATH.read_text())
+    # Imports of names the core already binds would only repeat in the bundle
+    core_names = imported_names(ast.parse(core_code).body)
+    lines = surface_code.replace(CORE_IMPORT, "").splitlines(keepends=True)
+    for node in reversed(ast.parse("".join(lines)).body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and imported_names([node]) <= core_names:
+            del lines[node.lineno - 1:node.end_lineno]
+    surface_code = "".join(lines)
+    # Open-WebUI reads the tool's metadata from the first docstring, so the
+    # surface docstring stays on top and the core follows as plain code
+    return f"{surface_doc}\n{core_code.strip()}\n\n\n{surface_code.strip()}\n"
+
+
+def main() -> int:
+    if len(sys.argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    sys.stdout.write(bundle(Path(sys.argv[1])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
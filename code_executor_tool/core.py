@@ -0,0 +1,606 @@
+"""
+Shared implementation of the Code Executor Open-WebUI tool.
+
+``openwebui_tool.py`` and ``openwebui_tool_docker.py`` subclass ``BaseTools``
+and only differ in their defaults. Open-WebUI expects a single pasted file,
+so ``python -m code_executor_tool.bundle`` inlines this module into them.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import sqlite3
+import time
+import httpx
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, AsyncIterator, List, Set, Tuple
+from pydantic import BaseModel, Field
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+# httpx only speaks HTTP/2 when the optional h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+# Responses larger than this are abandoned instead of buffered in full
+MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+# Upper bound on cached responses kept in memory
+CACHE_MAX_ENTRIES = 256
+# Upper bound on the on-disk cache enabled by the cache_dir valve
+DISK_CACHE_SIZE_LIMIT = 100 * 1024 * 1024
+# Failures of the on-disk cache, which then degrades to memory only
+DISK_CACHE_ERRORS = (OSError, sqlite3.Error)
+# Most runs the API accepts in one /runs/batch request
+MAX_BATCH_RUNS = 10
+# Interval between keepalive pings for warm workers
+WORKER_KEEPALIVE_S = 60
+# Transient API responses that are retried with exponential backoff
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+RETRY_BACKOFF_S = 0.3
+# Chat rendering of a run; blocks are empty strings when the field is absent
+RESULT_TEMPLATE = "{status_line}{stdout_block}{stderr_block}{exit_block}{timing_block}"
+SUCCESS_LINE = "✅ Execution successful"
+# Successful single-line output shorter than this is shown inline, unfenced
+TRIVIAL_OUTPUT_CHARS = 120
+
+
+class APIError(Exception):
+    """A request to the Code Executor API failed; the message is user-facing."""
+
+    def __init__(
+        self,
+        message: str,
+        status: Optional[int] = None,
+        retryable: bool = False,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket refilling `rate` tokens per second, bursting up to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._capacity = max(1.0, rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1) -> None:
+        # A cost above the burst waits for a full bucket and then goes into
+        # debt, so the requests after it are paced as if it were split up
+        need = min(cost, self._capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= need:
+                    self._tokens -= cost
+                    return
+                await asyncio.sleep((need - self._tokens) / self.rate)
+
+
+class BaseTools:
+    """Code Executor client shared by the Open-WebUI tool variants.
+
+    Subclasses name themselves ``Tools`` and override ``Valves`` defaults,
+    ``show_timing`` and ``connect_hint`` for their deployment.
+    """
+
+    # Append compile/execution timings from the run's usage to each result
+    show_timing = False
+    # Appended to connection errors to point at the usual misconfiguration
+    connect_hint = "If Open-WebUI is running in Docker, use the Docker version of this tool or change api_url to 'http://host.docker.internal:8080/v1/runs'"
+
+    class Valves(BaseModel):
+        api_url: str = Field(
+            default="http://localhost:8080/v1/runs",
+            description="Code Executor API endpoint"
+        )
+        api_key: str = Field(
+            default="dev_123",
+            description="API authentication token"
+        )
+        timeout: int = Field(
+            default=60,
+            description="Request timeout in seconds"
+        )
+        http2: bool = Field(
+            default=True,
+            description="Multiplex requests over one HTTP/2 connection when the API is served over TLS with h2 (needs the h2 package)"
+        )
+        max_retries: int = Field(
+            default=3,
+            description="Retries for rate-limited, unavailable, or unreachable API calls (0 disables)"
+        )
+        cache_ttl_s: int = Field(
+            default=0,
+            description="Seconds to reuse results of identical successful runs (0 disables caching)"
+        )
+        cache_dir: str = Field(
+            default="",
+            description="Directory for a cache that survives restarts (requires diskcache; empty keeps it in memory)"
+        )
+        reuse_worker: bool = Field(
+            default=False,
+            description="Run code in a warm per-language worker container instead of a fresh one per run"
+        )
+        max_rps: float = Field(
+            default=5.0,
+            description="Maximum API requests per second sent by this tool (0 disables)"
+        )
+        max_concurrency: int = Field(
+            default=4,
+            description="Maximum number of API requests in flight at once"
+        )
+        max_display_chars: int = Field(
+            default=8000,
+            description="Truncate stdout/stderr shown in chat beyond this many characters"
+        )
+
+    def __init__(self):
+        self.valves = self.Valves()
+        # Keep-alive client shared by every call so repeated runs reuse
+        # the same pooled connections to the API; created lazily so it is
+        # bound to the event loop Open-WebUI runs tools on
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_config: Optional[Tuple[str, int, bool]] = None
+        self._cache: "OrderedDict[bytes, Tuple[float, str]]" = OrderedDict()
+        self._disk_cache: Optional["diskcache.Cache"] = None
+        # cache_dir that could not be opened, so it is not retried per call
+        self._disk_cache_failed_dir: Optional[str] = None
+        self._workers: Dict[str, str] = {}
+        # API URLs found not to serve /workers, so runs go straight to /runs
+        self._workers_unsupported: Set[str] = set()
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._rate_limiter: Optional[TokenBucket] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_size = 0
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Valves can be replaced at runtime, so rebuild the client whenever
+        # the auth token, timeout or protocol no longer match
+        authorization = f"Bearer {self.valves.api_key}"
+        config = (authorization, self.valves.timeout, self.valves.http2 and HTTP2_AVAILABLE)
+        client = self._client
+        if client is None or client.is_closed or self._client_config != config:
+            if client is not None and not client.is_closed:
+                await client.aclose()
+            client = httpx.AsyncClient(
+                headers={
+                    "Authorization": authorization,
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(self.valves.timeout),
+                limits=httpx.Limits(max_connections=16),
+                http2=config[2]
+            )
+            self._client = client
+            self._client_config = config
+        return client
+
+    @staticmethod
+    def _cache_key(code: str, language: str) -> bytes:
+        return hashlib.sha256(f"{language}\0{code}".encode()).digest()
+
+    def _get_disk_cache(self) -> Optional["diskcache.Cache"]:
+        cache_dir = self.valves.cache_dir
+        if diskcache is None or not cache_dir or cache_dir == self._disk_cache_failed_dir:
+            return None
+        if self._disk_cache is None or self._disk_cache.directory != cache_dir:
+            if self._disk_cache is not None:
+                self._disk_cache.close()
+                self._disk_cache = None
+            try:
+                self._disk_cache = diskcache.Cache(cache_dir, size_limit=DISK_CACHE_SIZE_LIMIT)
+            except DISK_CACHE_ERRORS:
+                self._disk_cache_failed_dir = cache_dir
+                return None
+        return self._disk_cache
+
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        if self.valves.cache_ttl_s <= 0:
+            return None
+        entry = self._cache.get(key)
+        if entry is not None:
+            stored_at, output = entry
+            if time.monotonic() - stored_at <= self.valves.cache_ttl_s:
+                self._cache.move_to_end(key)
+                return output
+            del self._cache[key]
+        
+        disk_cache = self._get_disk_cache()
+        try:
+            record = disk_cache.get(key) if disk_cache is not None else None
+        except DISK_CACHE_ERRORS:
+            return None
+        if record is None:
+            return None
+        age = time.time() - record["cached_at"]
+        if age > self.valves.cache_ttl_s:
+            return None
+        # Promote into memory, keeping the entry's original age
+        self._cache_put(key, record["output"], time.monotonic() - age)
+        return record["output"]
+
+    def _cache_put(self, key: bytes, output: str, stored_at: Optional[float] = None) -> None:
+        self._cache[key] = (time.monotonic() if stored_at is None else stored_at, output)
+        self._cache.move_to_end(key)
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def _post(self, url: str, payload: Dict[str, Any], retry: bool = True, cost: int = 1) -> Any:
+        """POST a JSON payload and return the decoded response, raising APIError on failure.
+
+        `cost` is the number of runs the request starts, which the API
+        charges against the key's rate limit.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self._throttle(cost):
+                    return await self._post_once(url, payload)
+            except APIError as e:
+                if not retry or not e.retryable or attempt >= self.valves.max_retries:
+                    raise
+                delay = RETRY_BACKOFF_S * (2 ** attempt)
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    @asynccontextmanager
+    async def _throttle(self, cost: int = 1) -> AsyncIterator[None]:
+        # Pace requests client-side so a chatty agent does not run into
+        # the API's per-key rate limit; rebuilt when the valves change
+        size = max(1, self.valves.max_concurrency)
+        if self._semaphore is None or self._semaphore_size != size:
+            self._semaphore = asyncio.Semaphore(size)
+            self._semaphore_size = size
+        rate = self.valves.max_rps
+        if rate > 0 and (self._rate_limiter is None or self._rate_limiter.rate != rate):
+            self._rate_limiter = TokenBucket(rate)
+        async with self._semaphore:
+            if rate > 0:
+                await self._rate_limiter.acquire(cost)
+            yield
+
+    async def _post_once(self, url: str, payload: Dict[str, Any]) -> Any:
+        try:
+            client = await self._get_client()
+            async with client.stream("POST", url, content=_json_dumps(payload)) as response:
+                if response.status_code == 401:
+                    raise APIError("🔐 Authentication failed. Check API key configuration.", 401)
+                retryable = response.status_code in RETRY_STATUSES
+                retry_after = response.headers.get("Retry-After", "")
+                retry_after_s = float(retry_after) if retry_after.isdigit() else None
+                if response.status_code == 429:
+                    raise APIError(
+                        "⏸️ Rate limited. Please wait before trying again.",
+                        429,
+                        retryable,
+                        retry_after_s
+                    )
+                if response.status_code >= 400:
+                    await response.aread()
+                    raise APIError(
+                        f"❌ API error: {response.status_code} - {response.text}",
+                        response.status_code,
+                        retryable,
+                        retry_after_s
+                    )
+                return await self._read_json(response)
+        except httpx.TimeoutException:
+            raise APIError(f"⏱️ Code execution timed out ({self.valves.timeout} seconds limit)")
+        except httpx.TransportError as e:
+            raise APIError(f"❌ Could not connect to Code Executor API at {self.valves.api_url}\n\n{self.connect_hint}\n\nError: {str(e)}", retryable=True)
+
+    async def _read_json(self, response: httpx.Response) -> Any:
+        # Read incrementally so a runaway response is dropped at the cap
+        # rather than buffered in full before parsing
+        body = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            body.extend(chunk)
+            if len(body) > MAX_RESPONSE_BYTES:
+                raise APIError(f"❌ API response exceeded {MAX_RESPONSE_BYTES // (1024 * 1024)} MiB")
+        return _json_loads(body)
+
+    def _truncate(self, text: str) -> str:
+        limit = self.valves.max_display_chars
+        if limit <= 0 or len(text) <= limit:
+            return text
+        return f"{text[:limit]}\n... ({len(text) - limit} more characters truncated)\n"
+
+    def _api_url(self, path: str) -> str:
+        # api_url points at .../v1/runs; sibling endpoints share its prefix
+        base = self.valves.api_url.rstrip("/")
+        if base.endswith("/runs"):
+            base = base[: -len("/runs")]
+        return f"{base}/{path}"
+
+    async def _run_in_worker(self, language: str, code: str) -> Any:
+        run_payload = {"language": language, "code": code}
+        if self.valves.api_url in self._workers_unsupported:
+            return await self._post(self.valves.api_url, run_payload)
+        # A worker may be reaped server-side between calls, so retry once
+        # with a freshly provisioned one on 404
+        for attempt in range(2):
+            worker_id = self._workers.get(language)
+            if worker_id is None:
+                try:
+                    # Not retried: a 429 here usually means the per-key
+                    # worker limit, which waiting does not lift
+                    worker = await self._post(self._api_url("workers"), {"language": language}, retry=False)
+                except APIError as e:
+                    if e.status == 404:
+                        # API without warm worker support; stop asking
+                        self._workers_unsupported.add(self.valves.api_url)
+                    elif e.status != 429:
+                        raise
+                    return await self._post(self.valves.api_url, run_payload)
+                worker_id = self._workers[language] = worker["id"]
+                if self._keepalive_task is None or self._keepalive_task.done():
+                    self._keepalive_task = asyncio.create_task(self._keepalive_workers())
+            try:
+                return await self._post(self._api_url(f"workers/{worker_id}/exec"), {"code": code})
+            except APIError as e:
+                if e.status != 404 or attempt:
+                    raise
+                self._workers.pop(language, None)
+
+    async def _keepalive_workers(self) -> None:
+        while self._workers and self.valves.reuse_worker:
+            await asyncio.sleep(WORKER_KEEPALIVE_S)
+            for language, worker_id in list(self._workers.items()):
+                try:
+                    await self._post(self._api_url(f"workers/{worker_id}/keepalive"), {})
+                except APIError as e:
+                    if e.status == 404:
+                        self._workers.pop(language, None)
+
+    def _format_result(self, result: Dict[str, Any]) -> str:
+        status = result.get("status", "failed")
+        stdout = result.get("stdout")
+        stderr = result.get("stderr")
+        exit_code = result.get("exit_code")
+        usage = result.get("usage") if self.show_timing else None
+        
+        timing_block = ""
+        if usage:
+            if usage.get("compile_ms"):
+                timing_block = f"\n\n⏱️ Compile time: {usage['compile_ms']}ms"
+            timing_block += f"\n⏱️ Execution time: {usage.get('wall_ms', 0)}ms"
+
+        if status == "succeeded" and not stderr and stdout and len(stdout) < TRIVIAL_OUTPUT_CHARS:
+            line = stdout.strip()
+            if line and "\n" not in line:
+                return f"✅ {line}{timing_block}"
+        
+        return RESULT_TEMPLATE.format(
+            status_line=SUCCESS_LINE if status == "succeeded" else f"❌ Execution {status}",
+            stdout_block=f"\n\n📤 Output:\n```\n{self._truncate(stdout)}```" if stdout else "",
+            stderr_block=f"\n\n⚠️ Errors:\n```\n{self._truncate(stderr)}```" if stderr else "",
+            exit_block=f"\n\n🔢 Exit code: {exit_code}" if exit_code is not None else "",
+            timing_block=timing_block
+        )
+
+    def _cache_result(self, key: bytes, result: Dict[str, Any], output: str) -> None:
+        if (
+            self.valves.cache_ttl_s > 0
+            and result.get("status") == "succeeded"
+            and result.get("exit_code") == 0
+        ):
+            self._cache_put(key, output)
+            disk_cache = self._get_disk_cache()
+            if disk_cache is not None:
+                record = {
+                    "output": output,
+                    "status": result["status"],
+                    "exit_code": result["exit_code"],
+                    "cached_at": time.time()
+                }
+                try:
+                    disk_cache.set(key, record, expire=self.valves.cache_ttl_s)
+                except DISK_CACHE_ERRORS:
+                    # The run succeeded; losing the persistent copy is harmless
+                    pass
+
+    async def execute_code(
+        self,
+        code: str,
+        language: str = "python",
+        __user__: Optional[dict] = None
+    ) -> str:
+        """
+        Execute code in a sandboxed environment.
+        
+        :param code: The code to execute
+        :param language: Programming language (python, node, ruby, php, go)
+        :return: Execution results including output and any errors
+        """
+        
+        cache_key = self._cache_key(code, language)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        payload = {
+            "language": language,
+            "code": code
+        }
+        
+        try:
+            if self.valves.reuse_worker:
+                result = await self._run_in_worker(language, code)
+            else:
+                result = await self._post(self.valves.api_url, payload)
+            output = self._format_result(result)
+            self._cache_result(cache_key, result, output)
+            return output
+        except APIError as e:
+            return str(e)
+        except Exception as e:
+            return f"❌ Unexpected error: {str(e)}"
+
+    async def execute_batch(
+        self,
+        items: List[Dict[str, str]],
+        __user__: Optional[dict] = None
+    ) -> List[str]:
+        """
+        Execute several independent code snippets with a single API request.
+        
+        :param items: Objects with "code" and optional "language" keys
+        :return: Execution results, one per item in the same order
+        """
+        
+        outputs: List[Optional[str]] = [None] * len(items)
+        keys: List[Optional[bytes]] = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            code = item.get("code") if isinstance(item, dict) else None
+            language = item.get("language", "python") if isinstance(item, dict) else None
+            if not isinstance(code, str) or not isinstance(language, str):
+                outputs[index] = '❌ Invalid batch item: expected an object with a "code" string and optional "language"'
+                continue
+            keys[index] = self._cache_key(code, language)
+            outputs[index] = self._cache_get(keys[index])
+            if outputs[index] is None:
+                pending.append(index)
+        
+        # The API caps each batch request, so larger batches go out in chunks.
+        # They are sent one after another: each chunk spends up to a full
+        # burst of the key's rate limit, and concurrent chunks would starve
+        for start in range(0, len(pending), MAX_BATCH_RUNS):
+            chunk = pending[start:start + MAX_BATCH_RUNS]
+            results = await self._execute_batch_chunk(
+                [items[index] for index in chunk], [keys[index] for index in chunk], __user__
+            )
+            for index, output in zip(chunk, results):
+                outputs[index] = output
+        return outputs
+
+    async def _execute_batch_chunk(
+        self,
+        items: List[Dict[str, str]],
+        keys: List[bytes],
+        __user__: Optional[dict]
+    ) -> List[str]:
+        batch = [{"language": item.get("language", "python"), "code": item["code"]} for item in items]
+        
+        try:
+            results = await self._post(f"{self.valves.api_url.rstrip('/')}/batch", {"batch": batch}, cost=len(batch))
+        except APIError as e:
+            if e.status != 404:
+                return [str(e)] * len(batch)
+            # API predates the batch route; fan out individual runs instead
+            return list(await asyncio.gather(
+                *[self.execute_code(run["code"], run["language"], __user__) for run in batch]
+            ))
+        except Exception as e:
+            return [f"❌ Unexpected error: {str(e)}"] * len(batch)
+        
+        outputs = []
+        for key, result in zip(keys, results):
+            if "error" in result:
+                outputs.append(f"❌ API error: {result['error']}")
+                continue
+            output = self._format_result(result)
+            self._cache_result(key, result, output)
+            outputs.append(output)
+        return outputs
+
+    async def run_python(self, code: str, __user__: Optional[dict] = None) -> str:
+        """
+        Execute Python code in a sandboxed environment.
+        
+        :param code: Python code to execute
+        :return: Execution results
+        """
+        return await self.execute_code(code, "python", __user__)
+
+    async def run_javascript(self, code: str, __user__: Optional[dict] = None) -> str:
+        """
+        Execute JavaScript/Node.js code in a sandboxed environment.
+        
+        :param code: JavaScript code to execute
+        :return: Execution results
+        """
+        return await self.execute_code(code, "node", __user__)
+
+    async def run_ruby(self, code: str, __user__: Optional[dict] = None) -> str:
+        """
+        Execute Ruby code in a sandboxed environment.
+        
+        :param code: Ruby code to execute
+        :return: Execution results
+        """
+        return await self.execute_code(code, "ruby", __user__)
+
+    async def run_php(self, code: str, __user__: Optional[dict] = None) -> str:
+        """
+        Execute PHP code in a sandboxed environment.
+        
+        :param code: PHP code to execute
+        :return: Execution results
+        """
+        return await self.execute_code(code, "php", __user__)
+
+    async def run_go(self, code: str, __user__: Optional[dict] = None) -> str:
+        """
+        Execute Go code in a sandboxed environment.
+        
+        :param code: Go code to execute
+        :return: Execution results
+        """
+        return await self.execute_code(code, "go", __user__)
+
+    async def run_all(
+        self,
+        code_by_lang: Dict[str, str],
+        __user__: Optional[dict] = None
+    ) -> str:
+        """
+        Execute snippets in several languages concurrently and compare the results.
+        
+        :param code_by_lang: Mapping of language (python, node, ruby, php, go) to code
+        :return: Summary table followed by each language's execution results
+        """
+        # Parallelism is bounded by the max_concurrency valve in _throttle
+        results = await asyncio.gather(
+            *[self.execute_code(code, language, __user__) for language, code in code_by_lang.items()],
+            return_exceptions=True
+        )
+        
+        outputs = [
+            f"❌ Unexpected error: {str(result)}" if isinstance(result, BaseException) else result
+            for result in results
+        ]
+        summary = ["| Language | Result |", "| --- | --- |"]
+        sections = []
+        for language, output in zip(code_by_lang, outputs):
+            # Inline results can carry program output, which may contain pipes
+            first_line = output.splitlines()[0].replace("|", "\\|") if output else ""
+            summary.append(f"| {language} | {first_line} |")
+            sections.append(f"### {language}\n{output}")
+        return "\n".join(summary) + "\n\n" + "\n\n".join(sections)
@@ -1,19 +1,77 @@
 #!/usr/bin/env python3
+import hashlib
 import json
 import os
 import resource
+import selectors
+import shutil
 import subprocess
 import sys
 import time
 from pathlib import Path
 
+try:
+    import orjson
+    load_json = orjson.loads
+    dump_json = orjson.dumps
+except ImportError:
+    load_json = json.loads
+
+    def dump_json(obj):
+        return json.dumps(obj).encode()
+
+
+def collect_output(proc, timeout, max_bytes):
+    """Read proc's stdout/stderr as they arrive, killing it on timeout or once
+    either stream passes max_bytes. Returns (stdout, stderr, reason) where
+    reason is None, 'timeout' or 'output_limit'."""
+    deadline = time.monotonic() + timeout
+    buffers = {proc.stdout: bytearray(), proc.stderr: bytearray()}
+    reason = None
+    with selectors.DefaultSelector() as selector:
+        for stream in buffers:
+            selector.register(stream, selectors.EVENT_READ)
+        while reason is None and selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                reason = 'timeout'
+                break
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer = buffers[key.fileobj]
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    reason = 'output_limit'
+    if reason is None:
+        try:
+            proc.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            reason = 'timeout'
+    if reason is not None:
+        proc.kill()
+        proc.wait()
+    return bytes(buffers[proc.stdout][:max_bytes]), bytes(buffers[proc.stderr][:max_bytes]), reason
+
+
+# Children are started with close_fds=False. Other descriptors this process
+# holds (such as compile_proc's pipes) are close-on-exec by default (PEP 446),
+# so they are still not inherited. On this musl image CPython never uses
+# posix_spawn, so the flag only skips closing fds in the child and is
+# effectively a no-op here; process creation goes through _posixsubprocess
+# (vfork on Linux) either way.
+
 WORKDIR = Path('/work')
-SPEC = json.load(sys.stdin)
+SPEC = load_json(sys.stdin.buffer.read())
 LIMITS = SPEC.get('limits', {})
 
 os.chdir(WORKDIR)
 
-# Setup environment
+# Setup environment. GOCACHE is taken from the container so the sandbox can
+# point it at a shared build cache volume; otherwise it stays per-run
+gocache = os.environ.get('GOCACHE', '/work/tmp/go-cache')
 env = {key: value for key, value in SPEC.get('env', {}).items()}
 os.environ.clear()
 os.environ.update(env)
@@ -21,7 +79,7 @@ os.environ['HOME'] = '/work'
 os.environ['TMPDIR'] = '/work/tmp'
 os.environ['PATH'] = '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/usr/local/go/bin'
 os.environ['GOPATH'] = '/work/tmp/go'
-os.environ['GOCACHE'] = '/work/tmp/go-cache'
+os.environ['GOCACHE'] = gocache
 # Set Go memory limit to work in constrained environments
 os.environ['GOMEMLIMIT'] = f"{LIMITS.get('memory_mb', 256) * 1024 * 1024}B"
 # Disable memory profiling to reduce overhead
@@ -30,68 +88,120 @@ os.environ['GOGC'] = '50'
 Path('tmp').mkdir(parents=True, exist_ok=True)
 Path('outputs').mkdir(parents=True, exist_ok=True)
 
-# Set resource limits
-memory_bytes = int(LIMITS.get('memory_mb', 256) * 1024 * 1024)
+# Set resource limits. Memory, process count and open files are enforced by
+# the container (--memory, --pids-limit, --ulimit nofile); RLIMIT_AS and
+# RLIMIT_DATA both miscount Go's mmap'd heap, so only CPU time and file size
+# are capped here
 cpu_ms = int(LIMITS.get('cpu_ms', 5000))
 cpu_quota_seconds = max(1, cpu_ms // 1000 or 1)
-# Comment out RLIMIT_AS as it can interfere with Go's memory allocator
-# resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
-resource.setrlimit(resource.RLIMIT_DATA, (memory_bytes, memory_bytes))
 resource.setrlimit(resource.RLIMIT_FSIZE, (50 * 1024 * 1024, 50 * 1024 * 1024))
-resource.setrlimit(resource.RLIMIT_NPROC, (256, 256))
-resource.setrlimit(resource.RLIMIT_NOFILE, (256, 256))
 resource.setrlimit(resource.RLIMIT_CPU, (cpu_quota_seconds, cpu_quota_seconds))
 
+# Reject degenerate sources before paying for a go build
+src = Path('main.go').read_bytes()
+if not src.strip():
+    sys.stderr.buffer.write(b'empty program\n')
+    sys.exit(1)
+if len(src) > int(LIMITS.get('max_source_bytes', 1_000_000)):
+    sys.stderr.buffer.write(b'program exceeds source size limit\n')
+    sys.exit(1)
+
+max_output_bytes = int(LIMITS.get('max_output_bytes', 1024 * 1024))
+
+
+def write_stderr(body=b'', prefix=b'', suffix=b''):
+    """Write prefix + body + suffix, trimming body so the total stays within
+    max_output_bytes; the sandbox treats anything past it as runaway output."""
+    room = max(0, max_output_bytes - len(prefix) - len(suffix))
+    sys.stderr.buffer.write(prefix + body[:room] + suffix)
+
+
 # COMPILATION PHASE
 compile_start = time.time()
 # Use build flags to reduce memory usage during compilation
-compile_cmd = ['go', 'build', '-ldflags', '-s -w', '-o', 'main', 'main.go']
-
-compile_proc = subprocess.Popen(
-    compile_cmd, 
-    stdout=subprocess.PIPE, 
-    stderr=subprocess.PIPE,
-    text=False
+compile_cmd = [shutil.which('go') or '/usr/local/go/bin/go', 'build', '-ldflags', '-s -w', '-o', 'main', 'main.go']
+
+# Reuse a binary built from identical source, flags, toolchain and build
+# environment, if one is cached. The caller's env can set GOFLAGS, GOARCH,
+# CGO_ENABLED, GOEXPERIMENT and the like, and the cache may outlive the image
+# on a shared volume, so all of those are part of the key. Variables the
+# entrypoint sets only for the runtime stay out so they don't split the cache
+RUNTIME_ONLY_ENV = {'GOCACHE', 'GOMEMLIMIT', 'GOGC'}
+go_root = Path(compile_cmd[0]).resolve().parent.parent
+try:
+    go_version = (go_root / 'VERSION').read_bytes().split(b'\n', 1)[0]
+except OSError:
+    go_version = subprocess.run([compile_cmd[0], 'env', 'GOVERSION'], capture_output=True).stdout.strip()
+build_env = sorted(
+    (key, value) for key, value in os.environ.items()
+    if (key.startswith(('GO', 'CGO_')) or key in ('CC', 'CXX', 'AR', 'PKG_CONFIG'))
+    and key not in RUNTIME_ONLY_ENV
 )
+key_material = b'\0'.join([src, ' '.join(compile_cmd).encode(), go_version, dump_json(build_env)])
+src_hash = hashlib.sha256(key_material).hexdigest()
+cache_bin = Path(os.environ['GOCACHE']) / 'bin' / src_hash
+
+if cache_bin.exists():
+    shutil.copy(cache_bin, 'main')
+    compile_time = 0.0
+else:
+    compile_proc = subprocess.Popen(
+        compile_cmd, 
+        stdout=subprocess.PIPE, 
+        stderr=subprocess.PIPE,
+        text=False,
+        close_fds=False
+    )
 
-try:
     # Give compilation 10 seconds max
-    compile_stdout, compile_stderr = compile_proc.communicate(timeout=10)
-except subprocess.TimeoutExpired:
-    compile_proc.kill()
-    sys.stderr.buffer.write(b'Compilation timed out\n')
-    sys.exit(124)
-
-# Check compilation result
-if compile_proc.returncode != 0:
-    # Compilation failed - report compilation errors
-    sys.stderr.buffer.write(b'Compilation failed:\n')
-    sys.stderr.buffer.write(compile_stderr[:LIMITS.get('max_output_bytes', 1024 * 1024)])
-    sys.exit(1)
-
-compile_time = time.time() - compile_start
+    compile_stdout, compile_stderr, compile_reason = collect_output(compile_proc, 10, max_output_bytes)
+    if compile_reason == 'timeout':
+        sys.stderr.buffer.write(b'Compilation timed out\n')
+        sys.exit(124)
+
+    # Check compilation result
+    if compile_reason is not None or compile_proc.returncode != 0:
+        # Compilation failed - report compilation errors
+        write_stderr(compile_stderr, prefix=b'Compilation failed:\n')
+        sys.exit(1)
+
+    compile_time = time.time() - compile_start
+
+    # Publish atomically so concurrent runners never exec a partial binary
+    try:
+        cache_bin.parent.mkdir(parents=True, exist_ok=True)
+        tmp_bin = cache_bin.with_name(f'{src_hash}.{os.getpid()}.tmp')
+        shutil.copy('main', tmp_bin)
+        os.replace(tmp_bin, cache_bin)
+    except OSError:
+        pass
 
 # EXECUTION PHASE
 run_cmd = ['./main'] + SPEC.get('args', [])
-start = time.time()
-proc = subprocess.Popen(run_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=False)
 
-try:
-    timeout = LIMITS.get('timeout_ms', 5000) / 1000
-    stdout, stderr = proc.communicate(timeout=timeout)
-except subprocess.TimeoutExpired:
-    proc.kill()
-    stdout, stderr = proc.communicate()
-    sys.stderr.buffer.write(b'Execution timed out\n')
-    sys.exit(124)
+if LIMITS.get('no_usage_json', False):
+    # Replace this process instead of supervising the binary; `timeout` keeps
+    # the wall clock limit (exit 124) and the API measures wall time itself
+    timeout_s = LIMITS.get('timeout_ms', 5000) / 1000
+    os.execvpe('timeout', ['timeout', '-k', '1', f'{timeout_s}'] + run_cmd, os.environ)
 
-end = time.time()
+start = time.time()
+proc = subprocess.Popen(run_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=False, close_fds=False)
 
-# Truncate output if needed
-stdout = stdout[:int(LIMITS.get('max_output_bytes', 1024 * 1024))]
-stderr = stderr[:int(LIMITS.get('max_output_bytes', 1024 * 1024))]
+# Stream output instead of communicate() so runaway output is cut off at the
+# limit and a timed out program still returns what it printed
+timeout = LIMITS.get('timeout_ms', 5000) / 1000
+stdout, stderr, reason = collect_output(proc, timeout, max_output_bytes)
+end = time.time()
 
 sys.stdout.buffer.write(stdout)
+
+if reason == 'timeout':
+    write_stderr(stderr, suffix=b'\nExecution timed out\n')
+    sys.exit(124)
+if reason == 'output_limit':
+    write_stderr(stderr, suffix=b'\nOutput limit exceeded\n')
+    sys.exit(1)
 if stderr:
     sys.stderr.buffer.write(stderr)
 
@@ -104,6 +214,6 @@ usage = {
     'cpu_ms': cpu_ms,
     'max_rss_mb': int(children_usage.ru_maxrss / 1024)
 }
-Path('usage.json').write_text(json.dumps(usage))
+Path('usage.json').write_bytes(dump_json(usage))
 
 sys.exit(proc.returncode or 0)
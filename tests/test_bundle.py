@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+from code_executor_tool.bundle import bundle
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("surface, api_url, show_timing", [
+    ("openwebui_tool.py", "http://localhost:8080/v1/runs", False),
+    ("openwebui_tool_docker.py", "http://host.docker.internal:8080/v1/runs", True),
+])
+def test_bundle_is_self_contained(surface, api_url, show_timing):
+    source = bundle(ROOT / surface)
+
+    assert source.startswith('"""\nOpen-WebUI Tool: Code Executor')
+    assert "code_executor_tool" not in source
+    assert source.count("class BaseTools:") == 1
+    # The docker variant's own Field import is already made by the core
+    assert "\nfrom pydantic import Field\n" not in source
+
+    namespace = {"__name__": "bundled_tool"}
+    exec(compile(source, f"dist/{surface}", "exec"), namespace)
+    tools = namespace["Tools"]()
+    assert tools.valves.api_url == api_url
+    assert tools.show_timing is show_timing
+
+
+def test_bundle_rejects_files_without_core_import(tmp_path):
+    surface = tmp_path / "tool.py"
+    surface.write_text('"""Tool"""\n\nclass Tools:\n    pass\n')
+
+    with pytest.raises(ValueError):
+        bundle(surface)
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import sqlite3
+
+import httpx
+import pytest
+
+from code_executor_tool import core
+from code_executor_tool.core import BaseTools, TokenBucket
+
+API_URL = "http://api.test/v1/runs"
+
+
+def run_result(stdout="42\n", stderr="", status="succeeded"):
+    return {"status": status, "stdout": stdout, "stderr": stderr, "exit_code": 0 if status == "succeeded" else 1}
+
+
+class FakeClock:
+    """Stands in for the time module and asyncio.sleep so waits are instant and recorded."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(core, "time", fake)
+    monkeypatch.setattr(asyncio, "sleep", fake.sleep)
+    return fake
+
+
+def make_tools(handler, **valves):
+    tools = BaseTools()
+    tools.valves = BaseTools.Valves(api_url=API_URL, max_rps=0, **valves)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def get_client():
+        return client
+
+    tools._get_client = get_client
+    return tools
+
+
+class Recorder:
+    """MockTransport handler that records request paths and answers per path."""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.paths = []
+
+    def __call__(self, request):
+        self.paths.append(request.url.path)
+        answer = self.routes[request.url.path]
+        return answer(request) if callable(answer) else answer
+
+
+def test_cache_reuses_result_within_ttl(clock):
+    recorder = Recorder({"/v1/runs": httpx.Response(200, json=run_result())})
+    tools = make_tools(recorder, cache_ttl_s=60)
+
+    first = asyncio.run(tools.execute_code("print(42)"))
+    second = asyncio.run(tools.execute_code("print(42)"))
+
+    assert first == second == "✅ 42"
+    assert recorder.paths == ["/v1/runs"]
+
+
+def test_cache_expires_after_ttl(clock):
+    recorder = Recorder({"/v1/runs": httpx.Response(200, json=run_result())})
+    tools = make_tools(recorder, cache_ttl_s=60)
+
+    asyncio.run(tools.execute_code("print(42)"))
+    clock.now += 61
+    asyncio.run(tools.execute_code("print(42)"))
+
+    assert recorder.paths == ["/v1/runs", "/v1/runs"]
+
+
+def test_cache_evicts_least_recently_used(clock, monkeypatch):
+    monkeypatch.setattr(core, "CACHE_MAX_ENTRIES", 2)
+    tools = BaseTools()
+    tools.valves = BaseTools.Valves(cache_ttl_s=60)
+
+    tools._cache_put(b"a", "A")
+    tools._cache_put(b"b", "B")
+    assert tools._cache_get(b"a") == "A"
+    tools._cache_put(b"c", "C")
+
+    assert tools._cache_get(b"b") is None
+    assert tools._cache_get(b"a") == "A"
+    assert tools._cache_get(b"c") == "C"
+
+
+needs_diskcache = pytest.mark.skipif(core.diskcache is None, reason="diskcache not installed")
+
+
+@needs_diskcache
+def test_disk_cache_survives_a_new_instance(tmp_path):
+    recorder = Recorder({"/v1/runs": httpx.Response(200, json=run_result())})
+
+    for _ in range(2):
+        tools = make_tools(recorder, cache_ttl_s=60, cache_dir=str(tmp_path))
+        assert asyncio.run(tools.execute_code("print(42)")) == "✅ 42"
+        tools._disk_cache.close()
+
+    assert recorder.paths == ["/v1/runs"]
+
+
+@needs_diskcache
+def test_unusable_cache_dir_falls_back_to_memory(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    recorder = Recorder({"/v1/runs": httpx.Response(200, json=run_result())})
+    tools = make_tools(recorder, cache_ttl_s=60, cache_dir=str(blocker / "cache"))
+
+    assert asyncio.run(tools.execute_code("print(42)")) == "✅ 42"
+    assert asyncio.run(tools.execute_batch([{"code": "print(42)"}])) == ["✅ 42"]
+    assert recorder.paths == ["/v1/runs"]
+
+
+@needs_diskcache
+def test_disk_cache_write_failure_keeps_the_result(tmp_path, monkeypatch):
+    recorder = Recorder({"/v1/runs": httpx.Response(200, json=run_result())})
+    tools = make_tools(recorder, cache_ttl_s=60, cache_dir=str(tmp_path))
+    disk_cache = tools._get_disk_cache()
+
+    def failing_set(*args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(disk_cache, "set", failing_set)
+
+    assert asyncio.run(tools.execute_code("print(42)")) == "✅ 42"
+    disk_cache.close()
+
+
+def test_retries_transient_status_honouring_retry_after(clock):
+    responses = iter([
+        httpx.Response(503, headers={"Retry-After": "2"}, text="unavailable"),
+        httpx.Response(429),
+        httpx.Response(200, json=run_result()),
+    ])
+    recorder = Recorder({"/v1/runs": lambda request: next(responses)})
+    tools = make_tools(recorder)
+
+    assert asyncio.run(tools.execute_code("print(42)")) == "✅ 42"
+    assert clock.sleeps == [2.0, core.RETRY_BACKOFF_S * 2]
+
+
+def test_gives_up_after_max_retries(clock):
+    recorder = Recorder({"/v1/runs": httpx.Response(429)})
+    tools = make_tools(recorder, max_retries=2)
+
+    output = asyncio.run(tools.execute_code("print(42)"))
+
+    assert output.startswith("⏸️ Rate limited")
+    assert len(recorder.paths) == 3
+
+
+def test_does_not_retry_client_errors(clock):
+    recorder = Recorder({"/v1/runs": httpx.Response(400, text="bad language")})
+    tools = make_tools(recorder)
+
+    assert asyncio.run(tools.execute_code("x", "cobol")) == "❌ API error: 400 - bad language"
+    assert clock.sleeps == []
+
+
+def test_token_bucket_paces_after_burst(clock):
+    bucket = TokenBucket(2)
+
+    async def acquire_all():
+        for _ in range(4):
+            await bucket.acquire()
+
+    asyncio.run(acquire_all())
+
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_token_bucket_charges_weighted_cost_as_debt(clock):
+    bucket = TokenBucket(5)
+
+    async def acquire_all():
+        await bucket.acquire(10)
+        await bucket.acquire()
+
+    asyncio.run(acquire_all())
+
+    # The 10-run request drains the 5-token burst and 5 more, so the next
+    # request waits for the debt plus its own token
+    assert clock.sleeps == [pytest.approx(1.2)]
+
+
+def test_batch_requests_are_paced_per_run(clock):
+    def batch(request):
+        runs = json.loads(request.content)["batch"]
+        return httpx.Response(200, json=[run_result(run["code"]) for run in runs])
+
+    tools = make_tools(Recorder({"/v1/runs/batch": batch}))
+    tools.valves.max_rps = 5
+    items = [{"code": str(i)} for i in range(15)]
+
+    asyncio.run(tools.execute_batch(items))
+
+    # First chunk of 10 starts at a full bucket; the chunk of 5 then waits
+    # until the 5-token debt is repaid and 5 more tokens have accrued
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+def test_concurrency_is_bounded_by_semaphore():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=run_result())
+
+    tools = make_tools(handler, max_concurrency=2)
+
+    async def run_many():
+        return await asyncio.gather(*[tools.execute_code(f"print({i})") for i in range(6)])
+
+    assert len(asyncio.run(run_many())) == 6
+    assert peak == 2
+
+
+def test_batch_falls_back_to_single_runs_on_404():
+    recorder = Recorder({
+        "/v1/runs/batch": httpx.Response(404),
+        "/v1/runs": lambda request: httpx.Response(200, json=run_result(json.loads(request.content)["code"])),
+    })
+    tools = make_tools(recorder)
+
+    outputs = asyncio.run(tools.execute_batch([{"code": "a"}, {"code": "b", "language": "ruby"}]))
+
+    assert outputs == ["✅ a", "✅ b"]
+    assert recorder.paths.count("/v1/runs") == 2
+
+
+def test_batch_splits_into_api_sized_chunks_and_reports_bad_items():
+    sizes = []
+
+    def batch(request):
+        runs = json.loads(request.content)["batch"]
+        sizes.append(len(runs))
+        return httpx.Response(200, json=[run_result(run["code"]) for run in runs])
+
+    tools = make_tools(Recorder({"/v1/runs/batch": batch}))
+    items = [{"code": str(i)} for i in range(12)] + [{"language": "python"}, "print(1)"]
+
+    outputs = asyncio.run(tools.execute_batch(items))
+
+    assert sizes == [core.MAX_BATCH_RUNS, 2]
+    assert outputs[:12] == [f"✅ {i}" for i in range(12)]
+    assert all(output.startswith("❌ Invalid batch item") for output in outputs[12:])
+
+
+def test_worker_probe_is_skipped_once_api_lacks_workers():
+    recorder = Recorder({
+        "/v1/workers": httpx.Response(404),
+        "/v1/runs": httpx.Response(200, json=run_result()),
+    })
+    tools = make_tools(recorder, reuse_worker=True)
+
+    asyncio.run(tools.execute_code("print(1)"))
+    asyncio.run(tools.execute_code("print(2)"))
+
+    assert recorder.paths == ["/v1/workers", "/v1/runs", "/v1/runs"]
+
+
+def test_worker_limit_falls_back_to_one_off_run(clock):
+    recorder = Recorder({
+        "/v1/workers": httpx.Response(429, json={"error": "worker limit reached"}),
+        "/v1/runs": httpx.Response(200, json=run_result()),
+    })
+    tools = make_tools(recorder, reuse_worker=True)
+
+    assert asyncio.run(tools.execute_code("print(42)")) == "✅ 42"
+    assert recorder.paths == ["/v1/workers", "/v1/runs"]
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize("result, expected", [
+    (run_result("42\n"), "✅ 42"),
+    (run_result("1\n2\n"), "✅ Execution successful\n\n📤 Output:\n```\n1\n2\n```\n\n🔢 Exit code: 0"),
+    (run_result("x" * 200), "✅ Execution successful\n\n📤 Output:\n```\n" + "x" * 200 + "```\n\n🔢 Exit code: 0"),
+    (run_result("42\n", stderr="warning\n"), "✅ Execution successful\n\n📤 Output:\n```\n42\n```\n\n⚠️ Errors:\n```\nwarning\n```\n\n🔢 Exit code: 0"),
+    (run_result("", status="failed"), "❌ Execution failed\n\n🔢 Exit code: 1"),
+])
+def test_format_result_inlines_only_trivial_output(result, expected):
+    assert BaseTools()._format_result(result) == expected
+
+
+def test_format_result_keeps_timing_on_trivial_output():
+    tools = BaseTools()
+    tools.show_timing = True
+    result = {**run_result("42\n"), "usage": {"wall_ms": 12}}
+
+    assert tools._format_result(result) == "✅ 42\n⏱️ Execution time: 12ms"